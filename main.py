@@ -1,38 +1,46 @@
+import os
 import re
+import sys
 from collections import UserDict
 from dataclasses import dataclass
-from datetime import datetime, timedelta
-import pickle
+from datetime import date, datetime, timedelta
+import msgpack
 
-
-def input_error(func):
-    def inner(*args, **kwargs):
-        try:
-            return func(*args, **kwargs)
-        except ValueError as e:
-            return f"Error: {str(e)}"
-
-    return inner
+_PHONE_RE = re.compile(
+    r"^\+?\d{1,3}?[-.\s]?(\(\d{1,4}\)|\d{1,4})[-.\s]?\d{1,4}[-.\s]?\d{1,9}$",
+    re.ASCII,
+)
+# days to move a congratulation by, indexed by weekday (weekends go to Monday)
+_WEEKEND_SHIFT = (0, 0, 0, 0, 0, 2, 1)
 
 
 def parse_input(user_input):
-    try:
-        cmd, *args = user_input.split()
-        cmd = cmd.strip().lower()
-        return cmd, *args
-    except ValueError:
+    parts = user_input.split(None, 1)
+    if not parts:
         raise ValueError("There are no arguments passed")
+    cmd = parts[0].lower()
+    args = parts[1].split() if len(parts) > 1 else []
+    return cmd, *args
 
 
-@dataclass
+@dataclass(slots=True)
 class Field:
     value: str
 
     def __str__(self):
         return str(self.value)
 
+    @classmethod
+    def _trusted(cls, value: str):
+        # build from already-validated data (e.g. a saved book) without re-checking
+        field = cls.__new__(cls)
+        Field.__init__(field, value)
+        return field
+
 
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, name: str):
         if len(name) < 2:
             raise ValueError("Name should contain at least 2 characters")
@@ -40,6 +48,8 @@ class Name(Field):
 
 
 class Phone(Field):
+    __slots__ = ()
+
     validate_phone_error_msg = (
     "The phone should optionally contain country code (1-3 digits with/withount +) "
     "and mandatory contain a regional code (1-4 digits with/without brackets()) followed by up to 9 digits. "
@@ -51,62 +61,93 @@ class Phone(Field):
             raise ValueError(self.validate_phone_error_msg)
         super().__init__(phone)
 
-    def is_valid_phone(self, phone):
-        pattern = r"^\+?\d{1,3}?[-.\s]?(\(\d{1,4}\)|\d{1,4})[-.\s]?\d{1,4}[-.\s]?\d{1,9}$"
-        return bool(re.fullmatch(pattern, phone))
+    @staticmethod
+    def is_valid_phone(phone: str) -> bool:
+        return _PHONE_RE.fullmatch(phone) is not None
 
 
 class Birthday(Field):
+    __slots__ = ("date",)
+
     def __init__(self, value):
-        date = self.parse_date(value)
-        if date is None:
+        parsed_date = self.parse_date(value)
+        if parsed_date is None:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
         super().__init__(value)
+        self.date = parsed_date
+
+    @classmethod
+    def _trusted(cls, value: str) -> "Birthday":
+        birthday = super()._trusted(value)
+        birthday.date = birthday.parse_date(value)
+        if birthday.date is None:
+            raise ValueError("Invalid date format. Use DD.MM.YYYY")
+        return birthday
 
-    def parse_date(self, date_str: str) -> datetime | None:
+    def parse_date(self, date_str: str) -> date | None:
+        if len(date_str) != 10 or date_str[2] != "." or date_str[5] != ".":
+            return None
+        day, month, year = date_str[:2], date_str[3:5], date_str[6:]
+        if not (day + month + year).isdigit():
+            return None
         try:
-            return datetime.strptime(date_str, "%d.%m.%Y")
+            return date(int(year), int(month), int(day))
         except ValueError:
             return None
 
 
 class Record:
+    __slots__ = ("name", "phones", "_phone_index", "birthday")
+
     def __init__(self, name):
-        self.name: Name = Name(name)
+        self.name: Name = Name(sys.intern(name))
         self.phones: list[Phone] = []
+        self._phone_index: dict[str, Phone] = {}
         self.birthday: Birthday = None
 
+    @classmethod
+    def _trusted(cls, name: str, phones: list[str], birthday: str | None) -> "Record":
+        record = cls.__new__(cls)
+        record.name = Name._trusted(sys.intern(name))
+        record.phones = [Phone._trusted(phone) for phone in phones]
+        record._phone_index = {phone.value: phone for phone in record.phones}
+        record.birthday = Birthday._trusted(birthday) if birthday else None
+        return record
+
     def add_phone(self, phone: str) -> None:
-        self.phones.append(Phone(phone))
+        phone_item = Phone(phone)
+        self.phones.append(phone_item)
+        self._phone_index[phone] = phone_item
 
-    @input_error
     def remove_phone(self, phone):
-        existing_phone = self.find_phone(phone)
+        existing_phone = self._phone_index.pop(phone, None)
         if existing_phone:
             self.phones.remove(existing_phone)
             return "Phone has been removed"
         else:
             raise ValueError(f"Phone {phone} not found")
 
-    @input_error
     def change_phone(self, phone: str, new_phone: str):
         existing_phone = self.find_phone(phone)
 
         if not existing_phone:
             raise ValueError(f"Phone {phone} not found")
+        if new_phone != phone and new_phone in self._phone_index:
+            raise ValueError(
+                f"The phone {new_phone} already exists in contact {self.name.value}"
+            )
 
         new_phone_item = Phone(new_phone)
         self.phones[self.phones.index(existing_phone)] = new_phone_item
+        del self._phone_index[phone]
+        self._phone_index[new_phone] = new_phone_item
         return "Contact changed."
 
     def find_phone(self, phone: str) -> Phone:
-        for p in self.phones:
-            if p.value == phone:
-                return p
-        return None
+        return self._phone_index.get(phone)
 
-    @input_error
-    def add_birthday(self, birthday: str) -> None:
+    def _add_birthday(self, birthday: str) -> str:
+        # use AddressBook.add_birthday so the book's birthday index stays in sync
         if self.birthday:
             raise ValueError("Birthday already exists")
         self.birthday = Birthday(birthday)
@@ -120,33 +161,64 @@ class Record:
 
 
 class AddressBook(UserDict):
+    def __init__(self, *args, **kwargs):
+        # (month, day) -> {name: record} for contacts with a birthday
+        self._birthdays_by_day: dict[tuple[int, int], dict[str, Record]] = {}
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        if name in self.data:
+            self._unindex_birthday(name, self.data[name])
+        self.data[name] = record
+        self._index_birthday(name, record)
+
+    def __delitem__(self, name: str) -> None:
+        record = self.data.pop(name)
+        self._unindex_birthday(name, record)
+
+    def __copy__(self):
+        return self.__class__(self.data)
+
+    def _index_birthday(self, name: str, record: Record) -> None:
+        if not record.birthday:
+            return
+        birthday = record.birthday.date
+        day_records = self._birthdays_by_day.setdefault((birthday.month, birthday.day), {})
+        day_records[name] = record
+
+    def _unindex_birthday(self, name: str, record: Record) -> None:
+        if not record.birthday:
+            return
+        birthday = record.birthday.date
+        key = (birthday.month, birthday.day)
+        day_records = self._birthdays_by_day.get(key, {})
+        day_records.pop(name, None)
+        if not day_records:
+            self._birthdays_by_day.pop(key, None)
 
-    @input_error
     def add_record(self, args: list[str]) -> None:
         if len(args) < 2:
             raise ValueError(
                 '"add" command should contain 2 arguments "name" and "phone number"'
             )
-        name, phone = args[0], args[1]
+        name, phone = sys.intern(args[0]), args[1]
         existing_contact: Record = self.data.get(name, f"User {name} not found")
         if isinstance(existing_contact, str):
             new_record = Record(name)
             new_record.add_phone(phone)
-            self.data[name] = new_record
+            self[name] = new_record
             return f"Contact {name} added"
         else:
-            existing_contact_phones = existing_contact.phones
-            if Phone(phone) in existing_contact_phones:
+            if existing_contact.find_phone(phone):
                 raise ValueError(f"The phone {phone} already exists in contact {name}")
             else:
                 existing_contact.add_phone(phone)
                 return f"New phone for contact {name} has been added"
 
-    @input_error
-    def find(self, args: list[str]) -> Record | str:
+    def find(self, args: list[str]) -> Record:
         if not args:
             raise ValueError("Contact name missing")
-        name = args[0]
+        name = sys.intern(args[0])
         contact = self.data.get(name, f"User {name} not found")
 
         if isinstance(contact, str):
@@ -154,14 +226,24 @@ class AddressBook(UserDict):
 
         return contact
 
-    @input_error
     def delete(self, args: list[str]):
         if not args:
             raise ValueError("Contact name missing")
-        name = args[0]
-        self.data.pop(name, f"User {name} not found")
+        name = sys.intern(args[0])
+        self.pop(name, None)
         return f"Contact {name} deleted"
 
+    def add_birthday(self, args: list[str]) -> str:
+        if len(args) < 2:
+            raise ValueError(
+                '"add-birthday" command should contain 2 arguments "name" and "birthday" in format DD.MM.YYYY'
+            )
+        name = sys.intern(args[0])
+        contact = self.find(args)
+        result = contact._add_birthday(args[1])
+        self._index_birthday(name, contact)
+        return result
+
     def __str__(self):
         return (
             "\n".join(str(record) for record in self.data.values())
@@ -169,47 +251,115 @@ class AddressBook(UserDict):
             else "No contacts available"
         )
 
+    def print_all(self, file=None) -> None:
+        if not self.data:
+            print("No contacts available", file=file)
+            return
+        for record in self.data.values():
+            print(record, file=file)
+
     def get_upcoming_birthdays(self):
         today = datetime.today().date()
-        next_week = today + timedelta(days=7)
         upcoming_birthdays = []
-        all_users: list[Record] = self.data.values()
 
-        for user in all_users:
-            if not user.birthday:
+        # every date from today to the same day next week
+        for offset in range(8):
+            day = today + timedelta(days=offset)
+            day_records = self._birthdays_by_day.get((day.month, day.day))
+            if not day_records:
                 continue
-            birthday = datetime.strptime(user.birthday.value, "%d.%m.%Y").date()
-            birthday_this_year = birthday.replace(year=today.year)
-
-            if birthday_this_year < today:
-                birthday_this_year = birthday_this_year.replace(year=today.year + 1)
 
-            if today <= birthday_this_year <= next_week:
-                if birthday_this_year.weekday() in [5, 6]:
-                    birthday_this_year += timedelta(
-                        days=(7 - birthday_this_year.weekday())
-                    )
+            congratulation_date = day + timedelta(days=_WEEKEND_SHIFT[day.weekday()])
 
+            for user in day_records.values():
                 upcoming_birthdays.append(
                     {
                         "name": user.name.value,
-                        "congratulation_date": birthday_this_year.strftime("%d.%m.%Y"),
+                        "congratulation_date": congratulation_date.strftime("%d.%m.%Y"),
                     }
                 )
 
         return upcoming_birthdays
-    
-    def save_data(book, filename="addressbook.pkl"):
-       with open(filename, "wb") as f:
-        pickle.dump(book, f)
+
+    def _to_dict(self) -> dict[str, dict]:
+        return {
+            name: {
+                "phones": [p.value for p in record.phones],
+                "birthday": record.birthday.value if record.birthday else None,
+            }
+            for name, record in self.data.items()
+        }
+
+    @classmethod
+    def _from_dict(cls, data: dict[str, dict]) -> "AddressBook":
+        book = cls()
+        for name, fields in data.items():
+            try:
+                record = Record._trusted(name, fields["phones"], fields["birthday"])
+            except ValueError as e:
+                print(f"Birthday {fields['birthday']} of contact {name} ignored: {e}")
+                record = Record._trusted(name, fields["phones"], None)
+            book[record.name.value] = record
+        return book
+
+    def save_data(book, filename="addressbook.msgpack"):
+        with open(filename, "wb") as f:
+            msgpack.pack(book._to_dict(), f)
 
     @staticmethod
-    def load_data(filename="addressbook.pkl"):
-      try:
-        with open(filename, "rb") as f:
-            return pickle.load(f)
-      except FileNotFoundError:
-        return AddressBook()
+    def load_data(filename="addressbook.msgpack"):
+        try:
+            with open(filename, "rb") as f:
+                return AddressBook._from_dict(msgpack.unpack(f, raw=False))
+        except FileNotFoundError:
+            legacy_filename = os.path.splitext(filename)[0] + ".pkl"
+            if os.path.exists(legacy_filename):
+                print(
+                    f"Found {legacy_filename} from an older version; it is no longer loaded, "
+                    "starting with an empty address book."
+                )
+            return AddressBook()
+
+
+def change_contact(book: AddressBook, args: list[str]):
+    if len(args) < 3:
+        raise ValueError(
+            "'change' command should contain 3 arguments: name, old_phone, new_phone"
+        )
+    contact = book.find(args)
+    return contact.change_phone(args[1], args[2])
+
+
+def show_birthday(book: AddressBook, args: list[str]):
+    contact = book.find(args)
+    if contact.birthday:
+        return f"Birthday: {contact.birthday}"
+    return f"Birthday for contact {args[0]} hasn't been set"
+
+
+COMMANDS = {
+    "hello": lambda book, args: "How can I help you?",
+    "add": lambda book, args: book.add_record(args),
+    "all": lambda book, args: book.print_all(),
+    "phone": lambda book, args: book.find(args),
+    "delete": lambda book, args: book.delete(args),
+    "change": change_contact,
+    "add-birthday": lambda book, args: book.add_birthday(args),
+    "show-birthday": show_birthday,
+    "birthdays": lambda book, args: book.get_upcoming_birthdays(),
+}
+
+
+def read_commands():
+    if not sys.stdin.isatty():
+        # piped or redirected input: no prompt, read lines straight from stdin
+        yield from sys.stdin
+        return
+    while True:
+        try:
+            yield input("Enter a command: ")
+        except EOFError:
+            return
 
 
 def main():
@@ -217,62 +367,26 @@ def main():
 
     print("Welcome to the assistant bot!")
 
-    while True:
+    for user_input in read_commands():
         try:
-            user_input = input("Enter a command: ")
             command, *args = parse_input(user_input)
 
             if command in ["close", "exit"]:
-                print("Good bye!")
-                book.save_data()
                 break
 
-            elif command == "hello":
-                print("How can I help you?")
-
-            elif command == "add":
-                print(book.add_record(args))
-
-            elif command == "all":
-                print(book)
-
-            elif command == "phone":
-                print(book.find(args))
-
-            elif command == "delete":
-                print(book.delete(args))
-
-            elif command == "change":
-                if len(args) < 3:
-                    raise ValueError(
-                        "'change' command should contain 3 arguments: name, old_phone, new_phone"
-                    )
-                contact = book.find(args)
-                print(contact.change_phone(args[1], args[2]))
-
-            elif command == "add-birthday":
-                if len(args) < 2:
-                    raise ValueError(
-                        '"add-birthday" command should contain 2 arguments "name" and "birthday" in format DD.MM.YYYY'
-                    )
-                contact = book.find(args)
-                print(contact.add_birthday(args[1]))
-
-            elif command == "show-birthday":
-                contact = book.find(args)
-                if contact.birthday:
-                    print(f"Birthday: {contact.birthday}")
-                else:
-                    print(f"Birthday for contact {args[0]} hasn't been set")
-
-            elif command == "birthdays":
-                print(book.get_upcoming_birthdays())
-
+            handler = COMMANDS.get(command)
+            if handler:
+                result = handler(book, args)
+                if result is not None:
+                    print(result)
             else:
                 print("Invalid command.")
         except ValueError as e:
             print(f"Error: {str(e)}")
 
+    print("Good bye!")
+    book.save_data()
+
 
 if __name__ == "__main__":
     main()